@@ -4,7 +4,6 @@ from __future__ import annotations
 import os
 from pathlib import Path
 from functools import lru_cache
-import yaml
 from pydantic import BaseModel, Field
 
 
@@ -39,6 +38,11 @@ class Settings(BaseModel):
 @lru_cache(maxsize=1)
 def get_settings() -> Settings:
     yaml_path = Path(__file__).with_name("tools.yaml")
-    raw = yaml.safe_load(yaml_path.read_text()) if yaml_path.exists() else {}
+    if yaml_path.exists():
+        import yaml  # deferred: only needed when a tools.yaml is present
+
+        raw = yaml.safe_load(yaml_path.read_text())
+    else:
+        raw = {}
     raw["auth_passthrough"] = raw.get("auth", {}).get("passthrough", "bearer") == "bearer"
     return Settings(**raw)
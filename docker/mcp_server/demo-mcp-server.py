@@ -50,10 +50,13 @@ def time_now(tz: str = "UTC") -> str:
         return datetime.now(ZoneInfo("UTC")).isoformat()
 
 # --- optional health check for quick curl tests ---
+from starlette.responses import PlainTextResponse
+
+_HEALTH_RESP = PlainTextResponse("OK")  # built once; probes just get a pointer
+
 @mcp.custom_route("/health", methods=["GET"])
 async def health(_req):
-    from starlette.responses import PlainTextResponse
-    return PlainTextResponse("OK")
+    return _HEALTH_RESP
 
 if __name__ == "__main__":
     # Run with Streamable HTTP so you can connect via a localhost URL
@@ -1,35 +1,46 @@
 # mcp_server/server.py
 from __future__ import annotations
+import json
 import os
 from typing import List
 
+from starlette.responses import PlainTextResponse, Response
+
 from .mcp_app import mcp
 from .config import get_settings
-from .tools import load as load_tool, ALL as ALL_TOOLS
+from .tools import load as load_tool, validate as validate_tool
 
 # Load settings (enabled tools, limits, etc.)
 settings = get_settings()
 
-# Dynamically import and register enabled tools.
-# Importing a tool module causes its @mcp.tool decorators to run.
+# Validate the whole tools.yaml first (cheap find_spec checks, no imports),
+# then import and register the enabled tools. Registration has to stay eager:
+# the MCP handshake advertises each tool's schema, which only exists once the
+# module's @mcp.tool decorators have run.
 _loaded_tools: List[str] = []
 for tool_name in settings.enabled:
-    if tool_name not in ALL_TOOLS:
-        raise RuntimeError(f"Unknown tool {tool_name!r} in tools.yaml (allowed: {sorted(ALL_TOOLS)})")
+    validate_tool(tool_name)
+for tool_name in settings.enabled:
     load_tool(tool_name)
     _loaded_tools.append(tool_name)
 
+# Liveness probes hammer these routes, and their payloads are fixed once the
+# tools are loaded — build each response a single time and hand it back.
+_HEALTH_RESP = PlainTextResponse("OK")
+_ROOT_RESP = Response(
+    json.dumps({"name": "medschool-mcp", "tools": sorted(_loaded_tools)}).encode(),
+    media_type="application/json",
+)
+
 # Simple health check
 @mcp.custom_route("/health", methods=["GET"])
 async def health(_req):
-    from starlette.responses import PlainTextResponse
-    return PlainTextResponse("OK")
+    return _HEALTH_RESP
 
 # Handy root route listing the enabled tools
 @mcp.custom_route("/", methods=["GET"])
 async def root(_req):
-    from starlette.responses import JSONResponse
-    return JSONResponse({"name": "medschool-mcp", "tools": sorted(_loaded_tools)})
+    return _ROOT_RESP
 
 if __name__ == "__main__":
     # Run with Streamable HTTP so you can connect via a container port
@@ -7,6 +7,7 @@ ALL = {
     "fhir_validate": "mcp_server.tools.fhir",
     "fhir_doc": "mcp_server.tools.fhir",
     "code_lookup": "mcp_server.tools.terminology",
+    "code_lookup_batch": "mcp_server.tools.terminology",
     "snomed_to_icd10": "mcp_server.tools.terminology",
     "icd10_to_snomed": "mcp_server.tools.terminology",
     "notepad_write": "mcp_server.tools.notepad",
@@ -21,3 +22,26 @@ def load(tool_name: str):
     """Import the module that registers the requested tool."""
     mod_path = ALL[tool_name]
     return import_module(mod_path)  # registration side-effect
+
+
+def validate(tool_name: str) -> None:
+    """Fail fast on a misconfigured tools.yaml without importing anything.
+
+    find_spec only touches package metadata, so unknown names are caught
+    before any (potentially heavy) tool module is executed.
+    """
+    from importlib.util import find_spec
+
+    if tool_name not in ALL:
+        raise RuntimeError(f"Unknown tool {tool_name!r} in tools.yaml (allowed: {sorted(ALL)})")
+    if find_spec(ALL[tool_name]) is None:
+        raise RuntimeError(f"Tool {tool_name!r} maps to missing module {ALL[tool_name]!r}")
+
+
+def __getattr__(name: str):
+    # Lazy attribute access: `tools.fhir` imports mcp_server.tools.fhir on
+    # first touch instead of dragging every tool module in with the package.
+    try:
+        return import_module(f".{name}", __name__)
+    except ModuleNotFoundError as exc:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from exc
@@ -5,15 +5,29 @@ import json
 from typing import Any
 
 from ..mcp_app import mcp  # shared FastMCP instance
-from ..config import get_settings
+from ..config import ToolLimit, get_settings
 from ..utils.fhir_client import http_get, http_post
 
 settings = get_settings()
 
-# Helper to read per-tool limits safely
-def _limit_for(tool_name: str):
-    lim = settings.limits.get(tool_name)
-    return lim if lim is not None else None
+# orjson is ~5-10x faster than stdlib json on the large bundles these tools
+# shuttle around; fall back to stdlib when it isn't installed.
+try:
+    import orjson
+
+    def _dumps(data: Any) -> str:
+        return orjson.dumps(data).decode()
+
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(data: Any) -> str:
+        return json.dumps(data, separators=(",", ":"))
+
+    _loads = json.loads
+
+# Per-tool limits are static after config load, so resolve them here once
+# instead of re-reading settings.limits on every invocation.
+_MAX_RESULTS_FHIR_QUERY = (settings.limits.get("fhir_query") or ToolLimit()).max_results
 
 # ───────────────────────────── fhir_query ─────────────────────────────
 if "fhir_query" in settings.enabled:
@@ -29,10 +43,9 @@ if "fhir_query" in settings.enabled:
     def fhir_query(path: str) -> str:
         data = http_get(path)
         # Truncate search bundles if a limit is configured
-        lim = _limit_for("fhir_query")
-        if lim and getattr(lim, "max_results", None) and isinstance(data, dict) and "entry" in data:
-            data["entry"] = data["entry"][: lim.max_results]
-        return json.dumps(data, separators=(",", ":"))
+        if _MAX_RESULTS_FHIR_QUERY and isinstance(data, dict) and "entry" in data:
+            data["entry"] = data["entry"][:_MAX_RESULTS_FHIR_QUERY]
+        return _dumps(data)
 
 # ─────────────────────────── fhir_submit_bundle ───────────────────────
 if "fhir_submit_bundle" in settings.enabled:
@@ -41,9 +54,9 @@ if "fhir_submit_bundle" in settings.enabled:
         description="POST a FHIR Bundle to the server (transaction). Returns the operation result.",
     )
     def fhir_submit_bundle(bundle_json: str) -> str:
-        bundle = json.loads(bundle_json)
+        bundle = _loads(bundle_json)
         data = http_post("", bundle)
-        return json.dumps(data, separators=(",", ":"))
+        return _dumps(data)
 
 # ───────────────────────────── fhir_validate ──────────────────────────
 if "fhir_validate" in settings.enabled:
@@ -55,19 +68,24 @@ if "fhir_validate" in settings.enabled:
         ),
     )
     def fhir_validate(resource_json: str) -> dict[str, Any]:
-        resource = json.loads(resource_json)
+        resource = _loads(resource_json)
         return http_post("$validate", resource)
 
 # ───────────────────────────────── fhir_doc ───────────────────────────
+# Module-level so the dict (and its strings) is built once, not per call.
+# For demo, serve from local docstrings; production could read from files.
+_DOCS: dict[str, str] = {
+    "Patient": "### Patient\nKey elements: `identifier`, `name`, `gender`, `birthDate`, …",
+    "Observation": "### Observation\nImportant fields: `code`, `value[x]`, `subject`, `effective[x]` …",
+}
+
 if "fhir_doc" in settings.enabled:
     @mcp.tool(
         name="fhir_doc",
         description="Return a short markdown cheat-sheet for any core R4 resource type.",
     )
-    def fhir_doc(resource_type: str) -> str:  # pylint: disable=unused-argument
-        # For demo, serve from local docstrings; production could read from files.
-        docs: dict[str, str] = {
-            "Patient": "### Patient\nKey elements: `identifier`, `name`, `gender`, `birthDate`, …",
-            "Observation": "### Observation\nImportant fields: `code`, `value[x]`, `subject`, `effective[x]` …",
-        }
-        return docs.get(resource_type, f"No local docs for {resource_type}")
+    def fhir_doc(resource_type: str) -> str:
+        # No memoization: the body is a single dict lookup, and handing a
+        # _lru_cache_wrapper to mcp.tool breaks schema generation on current
+        # fastmcp anyway.
+        return _DOCS.get(resource_type) or f"No local docs for {resource_type}"
@@ -1,67 +1,75 @@
+import json
 import os
 import yaml
 import multiprocessing
 import time
+from pathlib import Path
+
+# Prefer the libyaml C bindings (~10x faster than pure-Python PyYAML);
+# fall back gracefully if PyYAML was built without them.
+try:
+    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeLoader, SafeDumper
 
 # --- YAML Formatting Solution ---
 
-# 1. A custom class to mark strings that should be dumped in the literal block style.
-class LiteralString(str):
-    pass
-
-# 2. A custom representer function that tells PyYAML how to dump our LiteralString.
-#    It will use the '|' style for multi-line blocks.
-def literal_representer(dumper, data):
-    return dumper.represent_scalar('tag:yaml.org,2002:str', data, style='|')
-
-# 3. A helper function to recursively find multi-line strings in the loaded data
-#    and wrap them in our custom LiteralString class.
-def convert_multiline_strings(data):
-    if isinstance(data, dict):
-        return {k: convert_multiline_strings(v) for k, v in data.items()}
-    if isinstance(data, list):
-        return [convert_multiline_strings(i) for i in data]
-    if isinstance(data, str) and '\n' in data:
-        return LiteralString(data)
-    return data
+# A custom representer that dumps any string containing a newline in the
+# literal block style ('|'). Deciding per scalar at dump time replaces the
+# old pre-pass that rebuilt the entire spec just to wrap multi-line strings
+# in a marker class — same output, one fewer full-tree copy in memory.
+def str_representer(dumper, data):
+    style = '|' if '\n' in data else None
+    return dumper.represent_scalar('tag:yaml.org,2002:str', data, style=style)
 
 # --- End of Formatting Solution ---
 
 
+# Worker-process state, populated once by _init_worker. Shipping base_spec
+# (the whole `components` block) inside every job tuple made pool.map pickle
+# it once per tag; the initializer sends it to each worker exactly once.
+_BASE_SPEC = None
+_TAG_DEFINITIONS = None
+_OUTPUT_FOLDER = None
+
+
+def _init_worker(base_spec, tag_definitions, output_folder):
+    global _BASE_SPEC, _TAG_DEFINITIONS, _OUTPUT_FOLDER
+    _BASE_SPEC = base_spec
+    _TAG_DEFINITIONS = tag_definitions
+    _OUTPUT_FOLDER = output_folder
+    # Register the custom representer once per worker process, not per job.
+    yaml.add_representer(str, str_representer, Dumper=SafeDumper)
+
+
 def create_spec_for_tag(args):
     """
     This is the worker function. It creates a spec file for a single tag,
     calculates its stats, and returns the stats to the main process.
     """
     # Unpack the arguments tuple
-    tag_name, paths, base_spec, tag_definition, output_folder = args
-    
+    tag_name, paths = args
+
     process_id = os.getpid()
     print(f"[Process {process_id}] Starting job for tag: '{tag_name}'")
 
     try:
         # Sanitize the tag name and create the full file path
         sanitized_tag = "".join(c for c in tag_name if c.isalnum() or c in (' ', '_')).replace(' ', '_')
-        filepath = os.path.join(output_folder, f"{sanitized_tag}.yaml")
+        filepath = os.path.join(_OUTPUT_FOLDER, f"{sanitized_tag}.yaml")
 
         # Create the spec dictionary for the current tag
-        tag_spec = base_spec.copy()
+        tag_definition = _TAG_DEFINITIONS.get(tag_name)
+        tag_spec = _BASE_SPEC.copy()
         tag_spec["tags"] = [tag_definition] if tag_definition else []
         tag_spec["paths"] = paths
-        
-        # --- Register the custom representer in the worker process ---
-        # This ensures the dumper knows how to handle our LiteralString class.
-        yaml.add_representer(LiteralString, literal_representer)
-
-        # Write the new spec to a YAML file, now with correct multi-line formatting
-        with open(filepath, 'w', encoding='utf-8') as f:
-            yaml.dump(tag_spec, f, sort_keys=False, indent=2, allow_unicode=True)
 
-        # Re-open the file to calculate stats
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-            line_count = len(content.splitlines())
-            char_count = len(content)
+        # Dump to a string so the stats come straight from memory instead of
+        # re-reading the file we just wrote.
+        content = yaml.dump(tag_spec, Dumper=SafeDumper, sort_keys=False, indent=2, allow_unicode=True)
+        Path(filepath).write_text(content, encoding='utf-8')
+        line_count = len(content.splitlines())
+        char_count = len(content)
 
         print(f"✅ [Process {process_id}] Created file for '{tag_name}' -> {filepath} [Lines: {line_count}, Chars: {char_count}]")
         
@@ -84,9 +92,29 @@ def run_processing(input_file="hapi-api-docs.yaml", output_folder="api_specs_by_
         os.makedirs(output_folder)
 
     print(f"📖 Reading and parsing main spec file: '{input_file}'...")
+    # JSON parses an order of magnitude faster than YAML, so keep a sidecar
+    # cache of the parsed spec and only re-read the YAML when it is newer.
+    cache_file = Path(input_file).with_suffix('.cache.json')
     try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            full_spec = yaml.safe_load(f)
+        full_spec = None
+        if cache_file.exists() and cache_file.stat().st_mtime >= os.stat(input_file).st_mtime:
+            print(f"⚡ Using JSON cache '{cache_file}' (up to date with the YAML).")
+            try:
+                with open(cache_file, 'r', encoding='utf-8') as f:
+                    full_spec = json.load(f)
+            except ValueError:
+                # Truncated/corrupt cache (e.g. an interrupted write);
+                # re-parse the YAML and rebuild it.
+                print(f"⚠️ Cache '{cache_file}' is unreadable; re-parsing the YAML.")
+        if full_spec is None:
+            with open(input_file, 'r', encoding='utf-8') as f:
+                full_spec = yaml.load(f, Loader=SafeLoader)
+            # Write-then-rename so an interrupted run can never leave a
+            # truncated cache behind with a fresh mtime.
+            tmp_file = cache_file.with_name(cache_file.name + '.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(full_spec, f)
+            os.replace(tmp_file, cache_file)
     except FileNotFoundError:
         print(f"🚨 FATAL ERROR: Input file '{input_file}' not found.")
         return
@@ -94,10 +122,6 @@ def run_processing(input_file="hapi-api-docs.yaml", output_folder="api_specs_by_
         print(f"🚨 FATAL ERROR: Could not parse YAML from '{input_file}'. Error: {e}")
         return
     
-    # --- Apply the formatting fix after loading the data ---
-    print("✨ Converting multi-line strings to preserve formatting...")
-    full_spec = convert_multiline_strings(full_spec)
-
     print("📋 Preparing base specification and grouping endpoints by tag...")
     base_spec = {
         "openapi": full_spec.get("openapi"),
@@ -125,17 +149,19 @@ def run_processing(input_file="hapi-api-docs.yaml", output_folder="api_specs_by_
         return
 
     tag_definitions = {t.get("name"): t for t in full_spec.get("tags", [])}
-    jobs = []
-    for tag_name, paths in paths_by_tag.items():
-        job_args = (tag_name, paths, base_spec, tag_definitions.get(tag_name), output_folder)
-        jobs.append(job_args)
+    jobs = list(paths_by_tag.items())
 
     print(f"👍 Setup complete. Found {len(jobs)} tags to process.")
-    
+
     print("\n🚀 Starting parallel processing using a pool of workers...")
-    
-    with multiprocessing.Pool() as pool:
-        results = pool.map(create_spec_for_tag, jobs)
+
+    with multiprocessing.Pool(
+        initializer=_init_worker,
+        initargs=(base_spec, tag_definitions, output_folder),
+    ) as pool:
+        # imap_unordered overlaps job dispatch with compute; order of the
+        # returned stats doesn't matter for the summary.
+        results = list(pool.imap_unordered(create_spec_for_tag, jobs, chunksize=4))
 
     print("\n--- Processing Complete ---")
     
@@ -1,14 +1,23 @@
 # mcp_server/tools/python_exec.py
 from __future__ import annotations
 
+import atexit
 import os
 import textwrap
-import json
+from functools import lru_cache
 from typing import Any
 
-import httpx
+# orjson parses large stdout payloads several times faster than stdlib json.
+try:
+    import orjson as _json
+except ImportError:
+    import json as _json
+
+# pydantic and fastmcp stay at module top: the decorator and result schema
+# need them as soon as this module is registered. httpx is deferred to the
+# first actual sandbox call (see _client below).
 from pydantic import BaseModel
-from fastmcp.exceptions import ToolError 
+from fastmcp.exceptions import ToolError
 from ..mcp_app import mcp  # shared FastMCP instance
 
 # Runtime config (overridable via env)
@@ -17,6 +26,20 @@ CPU_SEC  = int(os.getenv("PYEXEC_TIMEOUT_S", "6"))
 MEM_MB   = int(os.getenv("PYEXEC_MEM_MB", "512"))
 CPUS     = float(os.getenv("PYEXEC_CPUS", "1.0"))
 
+# One pooled keep-alive client for all sandbox calls; the sandbox sits on the
+# same Docker network, so reusing connections skips TCP setup per invocation.
+@lru_cache(maxsize=1)
+def _client():
+    import httpx  # deferred so registering the tool stays cheap
+
+    client = httpx.Client(
+        base_url=EXEC_URL,
+        timeout=CPU_SEC + 3,
+        limits=httpx.Limits(max_keepalive_connections=8, max_connections=16),
+    )
+    atexit.register(client.close)
+    return client
+
 
 class PythonExecResult(BaseModel):
     """
@@ -40,14 +63,18 @@ class PythonExecResult(BaseModel):
         "Args:\n"
         "  code (str, optional): Python source to execute. "
         "  You should print your final result to stdout (prefer JSON). "
-        "  If omitted, returns JSON with Python version and installed packages.\n\n"
+        "  If omitted, returns JSON with Python version and installed packages.\n"
+        "  cache (bool, optional, default false): allow the sandbox to serve a "
+        "cached result for identical code. Only enable for deterministic code.\n\n"
         "Returns (structured): {stdout, stderr, exit_code, json} "
         "where `json` is a parsed object if stdout was valid JSON.\n\n"
         "Errors: This tool raises MCP ToolError for sandbox failures or if the script "
         "produces no stdout."
     ),
 )
-def python_exec(code: str | None = None) -> PythonExecResult:
+def python_exec(code: str | None = None, cache: bool = False) -> PythonExecResult:
+    import httpx
+
     # If no code is provided, report environment info (python + installed packages)
     if not code:
         code = (
@@ -59,18 +86,22 @@ def python_exec(code: str | None = None) -> PythonExecResult:
         )
 
     payload = {
-        "code": textwrap.dedent(code),
+        # dedent scans the whole string; skip it unless the code actually
+        # starts with whitespace (the triple-quoted-literal case).
+        "code": code if not code[:1].isspace() else textwrap.dedent(code),
         "timeout_s": CPU_SEC,
         "mem_mb": MEM_MB,
         "cpus": CPUS,
+        # Agent code is frequently nondeterministic (random, time, ...), so
+        # result caching is strictly opt-in from this caller.
+        "cache": cache,
     }
 
     try:
         # Call the sandbox executor
-        with httpx.Client(timeout=CPU_SEC + 3) as client:
-            resp = client.post(f"{EXEC_URL}/run", json=payload)
-            resp.raise_for_status()
-            data = resp.json()
+        resp = _client().post("/run", json=payload)
+        resp.raise_for_status()
+        data = resp.json()
     except httpx.HTTPError as e:
         # Transport/HTTP problems reaching the sandbox → tool execution error
         raise ToolError(f"sandbox HTTP error: {e}. Check sandbox service ({EXEC_URL}).") from e
@@ -105,7 +136,7 @@ def python_exec(code: str | None = None) -> PythonExecResult:
     # Try to parse JSON (helpful for downstream agents/clients)
     parsed = None
     try:
-        parsed = json.loads(out) if out.strip() else None
+        parsed = _json.loads(out) if out.strip() else None
     except Exception:
         parsed = None  # stdout wasn't JSON; that's fine
 
@@ -1,12 +1,14 @@
 # mcp_server/tools/shell_exec.py
 from __future__ import annotations
 
-import json
+import atexit
 import os
-import textwrap
+from functools import lru_cache
 from typing import Any, Optional
 
-import httpx
+# pydantic and fastmcp stay at module top: the decorator and result schema
+# need them as soon as this module is registered. httpx is deferred to the
+# first actual sandbox call (see _client below).
 from fastmcp.exceptions import ToolError
 from pydantic import BaseModel
 
@@ -18,6 +20,20 @@ CPU_SEC  = int(os.getenv("PYEXEC_TIMEOUT_S", "6"))
 MEM_MB   = int(os.getenv("PYEXEC_MEM_MB", "512"))
 CPUS     = float(os.getenv("PYEXEC_CPUS", "1.0"))
 
+# One pooled keep-alive client shared by all shell_exec calls (same reasoning
+# as python_exec: the sandbox is a neighbour container, keep the socket warm).
+@lru_cache(maxsize=1)
+def _client():
+    import httpx  # deferred so registering the tool stays cheap
+
+    client = httpx.Client(
+        base_url=EXEC_URL,
+        timeout=CPU_SEC + 3,
+        limits=httpx.Limits(max_keepalive_connections=8, max_connections=16),
+    )
+    atexit.register(client.close)
+    return client
+
 class ShellExecResult(BaseModel):
     stdout: str
     stderr: str
@@ -44,48 +60,31 @@ class ShellExecResult(BaseModel):
     ),
 )
 def shell_exec(script: str, stdin: Optional[str] = None, timeout_s: Optional[int] = None) -> ShellExecResult:
-    # Build a tiny Python wrapper that spawns the shell inside the *inner* sandbox container.
-    py_wrapper = f"""
-import json, subprocess, os, sys
-script = {json.dumps(script)}
-inp    = {json.dumps(stdin or "")}
-# Prefer bash if present for nicer pipes/globs; fall back to sh.
-shell = "/bin/bash" if os.path.exists("/bin/bash") else "/bin/sh"
-p = subprocess.run([shell, "-lc", script], input=inp, text=True, capture_output=True)
-print(json.dumps({{"stdout": p.stdout, "stderr": p.stderr, "exit_code": p.returncode}}))
-""".strip()
+    import httpx
 
+    # The sandbox's /shell endpoint runs the script directly, so the script
+    # and stdin travel as plain JSON fields instead of being embedded inside
+    # generated Python source and re-decoded on the way back.
     payload = {
-        "code": textwrap.dedent(py_wrapper),
+        "script": script,
+        "stdin": stdin or "",
         "timeout_s": int(timeout_s or CPU_SEC),
         "mem_mb": MEM_MB,
         "cpus": CPUS,
     }
 
     try:
-        with httpx.Client(timeout=(timeout_s or CPU_SEC) + 3) as client:
-            resp = client.post(f"{EXEC_URL}/run", json=payload)
-            resp.raise_for_status()
-            data = resp.json()
+        # Per-call timeout override goes on the request, not a fresh client.
+        resp = _client().post("/shell", json=payload, timeout=(timeout_s or CPU_SEC) + 3)
+        resp.raise_for_status()
+        data = resp.json()
     except httpx.HTTPError as e:
         raise ToolError(f"sandbox HTTP error: {e}. Check sandbox service ({EXEC_URL}).") from e
     except Exception as e:
         raise ToolError(f"sandbox invocation error: {e}.") from e
 
-    # Outer sandbox succeeded; inner shell result is encoded in stdout JSON.
-    out = (data.get("stdout") or "").strip()
-    err = (data.get("stderr") or "")
-    if not out:
-        # Non-fatal: shell could be silent; return structured with exit_code if we can parse it
-        return ShellExecResult(stdout="", stderr=err, exit_code=0)
-
-    try:
-        inner = json.loads(out)
-        return ShellExecResult(
-            stdout=inner.get("stdout", ""),
-            stderr=(inner.get("stderr", "") or err),
-            exit_code=int(inner.get("exit_code", 0)),
-        )
-    except Exception:
-        # If the wrapper somehow didn't print JSON, fall back to outer output.
-        return ShellExecResult(stdout=out, stderr=err, exit_code=0)
+    return ShellExecResult(
+        stdout=data.get("stdout") or "",
+        stderr=data.get("stderr") or "",
+        exit_code=int(data.get("exit_code", 0)),
+    )
@@ -23,6 +23,23 @@ def code_lookup(code: str, system: str | None = None) -> Dict[str, Any]:
     return tc.lookup(code, system)
 
 
+@mcp.tool(
+    name="code_lookup_batch",
+    description=(
+        "Resolve display names for several codes in **one** round-trip "
+        "(a FHIR batch Bundle of $lookup requests). Prefer this over "
+        "repeated code_lookup calls when you have a list of codes.\n\n"
+        "Args:\n"
+        "  codes: The code values, e.g. ['E11.9', '44054006'].\n"
+        "  system: Optional canonical system URI applied to every code. "
+        "If omitted, the server will guess per code from its format.\n"
+        "Returns: list of {system, code, display, version, synonyms[]}."
+    ),
+)
+def code_lookup_batch(codes: List[str], system: str | None = None) -> List[Dict[str, Any]]:
+    return tc.lookup_batch(codes, system)
+
+
 # ────────────────── Simple hard-wired cross-walks ───────────────
 @mcp.tool(
     name="snomed_to_icd10",
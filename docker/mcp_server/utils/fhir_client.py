@@ -1,27 +1,41 @@
 # mcp_server/utils/fhir_client.py
 from __future__ import annotations
 
-import httpx
-from ..config import get_settings
+import atexit
+from functools import lru_cache
 
-settings = get_settings()
+_POST_TIMEOUT = 30.0
 
-HEADERS = {"Accept": "application/fhir+json"}
-if settings.bearer_token:
-    HEADERS["Authorization"] = f"Bearer {settings.bearer_token}"
+
+@lru_cache(maxsize=1)
+def _client():
+    """Lazily build the one keep-alive client shared by all FHIR calls."""
+    import httpx  # deferred so importing this module stays cheap
+
+    from ..config import ToolLimit, get_settings
+
+    settings = get_settings()
+    headers = {"Accept": "application/fhir+json"}
+    if settings.bearer_token:
+        headers["Authorization"] = f"Bearer {settings.bearer_token}"
+    # `limits.get(..., {})` used to hand back a dict whose missing .timeout_s
+    # raised AttributeError whenever fhir_query had no limits entry.
+    client = httpx.Client(
+        base_url=f"{settings.fhir_base_url.rstrip('/')}/",
+        headers=headers,
+        timeout=(settings.limits.get("fhir_query") or ToolLimit()).timeout_s or 30,
+    )
+    atexit.register(client.close)
+    return client
 
 
 def http_get(path: str, params: dict | None = None) -> dict:
-    url = f"{settings.fhir_base_url.rstrip('/')}/{path.lstrip('/')}"
-    with httpx.Client(timeout=settings.limits.get("fhir_query", {}).timeout_s or 30) as client:
-        r = client.get(url, params=params, headers=HEADERS)
-        r.raise_for_status()
-        return r.json()
+    r = _client().get(path.lstrip('/'), params=params)
+    r.raise_for_status()
+    return r.json()
 
 
 def http_post(path: str, json_body: dict) -> dict:
-    url = f"{settings.fhir_base_url.rstrip('/')}/{path.lstrip('/')}"
-    with httpx.Client(timeout=30.0) as client:
-        r = client.post(url, json=json_body, headers=HEADERS)
-        r.raise_for_status()
-        return r.json()
+    r = _client().post(path.lstrip('/'), json=json_body, timeout=_POST_TIMEOUT)
+    r.raise_for_status()
+    return r.json()
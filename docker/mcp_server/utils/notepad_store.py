@@ -6,15 +6,23 @@ Swap for Redis if REDIS_URL env var is set.
 from __future__ import annotations
 
 import os
-from typing import Any
+from collections import OrderedDict
 import redis
 
 if os.getenv("REDIS_URL"):
-    _r = redis.from_url(os.environ["REDIS_URL"], decode_responses=True)  # type: ignore
+    # Explicit pool sizing so concurrent tool calls don't serialize on a
+    # single connection.
+    _pool = redis.ConnectionPool.from_url(
+        os.environ["REDIS_URL"], max_connections=32, decode_responses=True
+    )
+    _r = redis.Redis(connection_pool=_pool)  # type: ignore
 else:
     _r = None  # in-process fallback
 
-_STORE: dict[str, str] = {}
+# LRU-bounded fallback store: per-value 1 KB cap plus a hard entry cap so a
+# long-lived process can't grow the scratchpad without limit.
+_STORE: OrderedDict[str, str] = OrderedDict()
+_MAX_ENTRIES = 1024
 
 
 def write(key: str, value: str) -> None:
@@ -22,6 +30,9 @@ def write(key: str, value: str) -> None:
         _r.set(key, value, ex=3600)  # expire in 1 h
     else:
         _STORE[key] = value[:1024]  # 1 KB cap
+        _STORE.move_to_end(key)
+        while len(_STORE) > _MAX_ENTRIES:
+            _STORE.popitem(last=False)  # evict least recently written
 
 
 def read(key: str) -> str | None:
@@ -6,34 +6,53 @@
 """
 from __future__ import annotations
 
-import httpx
+import atexit
+import os
+import re
+from functools import lru_cache
 from typing import Any, Dict
-from ..config import get_settings
-
-settings = get_settings()
 
 HEADERS = {"Accept": "application/fhir+json"}
 
+_LOINC = "http://loinc.org"
+_ICD10_CM = "http://hl7.org/fhir/sid/icd-10-cm"
+_SNOMED = "http://snomed.info/sct"
 
-def _infer_system(code: str) -> str:
-    """Best-effort guess of code system if caller omits it."""
-    if code.isdigit():                       # 4548-4 → LOINC
-        return "http://loinc.org"
-    if "." in code and code[0].isalpha():    # E11.9 → ICD-10-CM
-        return "http://hl7.org/fhir/sid/icd-10-cm"
-    return "http://snomed.info/sct"          # default to SNOMED
+# One compiled scan instead of isdigit/substring checks per call:
+# group 1 → LOINC-shaped (digits, optional check-digit suffix like 4548-4),
+# group 2 → ICD-10-CM-shaped (letter prefix with a dotted subcode, E11.9).
+_SYS_RE = re.compile(r"^(?:(\d+(?:-\d+)?)|([A-Za-z]\w*\.\w+))$")
 
 
-def lookup(code: str, system: str | None = None) -> Dict[str, Any]:
-    system = system or _infer_system(code)
-    url = f"{settings.terminology_base_url.rstrip('/')}/CodeSystem/$lookup"
-    params = {"code": code, "system": system}
+@lru_cache(maxsize=1)
+def _client():
+    """Lazily build the one keep-alive client shared by all lookups."""
+    import httpx  # deferred so importing this module stays cheap
+
+    from ..config import ToolLimit, get_settings
+
+    settings = get_settings()
+    # `or ToolLimit()` keeps a missing code_lookup limits entry from blowing
+    # up with AttributeError on a plain dict.
+    client = httpx.Client(
+        base_url=f"{settings.terminology_base_url.rstrip('/')}/",
+        headers=HEADERS,
+        timeout=(settings.limits.get("code_lookup") or ToolLimit()).timeout_s or 10,
+    )
+    atexit.register(client.close)
+    return client
 
-    with httpx.Client(timeout=settings.limits.get("code_lookup", {}).timeout_s or 10) as client:
-        resp = client.get(url, params=params, headers=HEADERS)
-        resp.raise_for_status()
-        data = resp.json()
 
+def _infer_system(code: str) -> str:
+    """Best-effort guess of code system if caller omits it."""
+    m = _SYS_RE.match(code)
+    if m:
+        return _LOINC if m.group(1) else _ICD10_CM
+    return _SNOMED                           # default to SNOMED
+
+
+def _parse_lookup(data: Dict[str, Any], code: str, system: str) -> Dict[str, Any]:
+    """Flatten a $lookup Parameters resource into our result shape."""
     display: str | None = None
     version: str | None = None
     designations: list[str] = []
@@ -55,4 +74,72 @@ def lookup(code: str, system: str | None = None) -> Dict[str, Any]:
         "version": version,
         "synonyms": designations,
     }
- 
\ No newline at end of file
+
+
+def lookup(code: str, system: str | None = None) -> Dict[str, Any]:
+    system = system or _infer_system(code)
+    params = {"code": code, "system": system}
+
+    resp = _client().get("CodeSystem/$lookup", params=params)
+    resp.raise_for_status()
+    return _parse_lookup(resp.json(), code, system)
+
+
+# Whether the server accepts batch Bundles of $lookup requests; probed on the
+# first lookup_batch call and remembered.
+_BATCH_SUPPORTED: bool | None = None
+
+
+def lookup_batch(codes: list[str], system: str | None = None) -> list[Dict[str, Any]]:
+    """Resolve many codes in one round-trip via a FHIR batch Bundle.
+
+    Falls back to sequential lookup() calls when the server rejects the
+    bundle (remembered so later calls skip the failed attempt).
+    """
+    import httpx
+    from urllib.parse import urlencode
+
+    global _BATCH_SUPPORTED
+    pairs = [(code, system or _infer_system(code)) for code in codes]
+
+    if pairs and _BATCH_SUPPORTED is not False:
+        bundle = {
+            "resourceType": "Bundle",
+            "type": "batch",
+            "entry": [
+                {"request": {
+                    "method": "GET",
+                    "url": f"CodeSystem/$lookup?{urlencode({'system': sys_, 'code': code})}",
+                }}
+                for code, sys_ in pairs
+            ],
+        }
+        try:
+            resp = _client().post("", json=bundle)
+            resp.raise_for_status()
+            entries = resp.json().get("entry", [])
+        except httpx.HTTPStatusError:
+            _BATCH_SUPPORTED = False       # server refused the bundle outright
+            entries = None
+        except httpx.HTTPError:
+            entries = None                 # transient; retry batching next time
+
+        if entries is not None and len(entries) == len(pairs):
+            _BATCH_SUPPORTED = True
+            results = []
+            for (code, sys_), entry in zip(pairs, entries):
+                resource = entry.get("resource") or {}
+                if resource.get("resourceType") == "Parameters":
+                    results.append(_parse_lookup(resource, code, sys_))
+                else:                      # per-entry failure → single retry
+                    results.append(lookup(code, sys_))
+            return results
+
+    return [lookup(code, sys_) for code, sys_ in pairs]
+
+
+# $lookup responses are immutable for a given terminology version, so memoize
+# them keyed on (code, system). Set MCP_DISABLE_LOOKUP_CACHE=1 to turn the
+# cache off while developing against a changing server.
+if not os.getenv("MCP_DISABLE_LOOKUP_CACHE"):
+    lookup = lru_cache(maxsize=4096)(lookup)
@@ -0,0 +1,23 @@
+/* mix.c — native port of the scripts/test.py mixing loop.
+ *
+ * Build (done during the sandbox image build):
+ *   gcc -O3 -march=native -shared -fPIC -o mix.so mix.c
+ *
+ * Each round is one widening 64x64->128 multiply whose high half is
+ * xor-folded into the low half — a single mulq + xorq on x86-64.
+ * Must stay bit-identical to _mix_py in test.py.
+ */
+#include <stdint.h>
+
+#define MUL_C 0x9E3779B97F4A7C15ULL
+
+uint64_t mix(uint64_t x, uint64_t rounds) {
+    for (uint64_t i = 0; i < rounds; i++) {
+        __uint128_t m = (__uint128_t)x * MUL_C;
+        x = (uint64_t)m ^ (uint64_t)(m >> 64);
+
+        /* mix in loop index via a simple linear congruential step */
+        x ^= i * 6364136223846793005ULL + 1442695040888963407ULL;
+    }
+    return x;
+}
@@ -0,0 +1,142 @@
+"""Persistent in-container job runner for the sandbox pool.
+
+execd keeps one `docker exec -i <cid> python -u /app/worker.py` open per
+pooled container and sends Python jobs over it, so a /run request pays
+neither a docker exec round-trip nor interpreter startup. The protocol is
+length-prefixed binary frames on stdin/stdout:
+
+  request:  >I code_len | code (utf-8)
+  response: >iII exit_code, stdout_len, stderr_len | stdout | stderr
+
+With `--socket <path>` the same frames flow over a Unix domain socket the
+host listens on (mounted into the container), bypassing the docker
+exec/shim stdio path entirely; without it, frames go over stdin/stdout.
+
+Each job executes in a fresh namespace (with __name__ == "__main__", like
+`python -`) and with fds 1/2 redirected to scratch files for its duration,
+so output from subprocesses, os.write and C extensions is captured just like
+under `python -` and can't interleave with the frame stream.
+
+The loop exits after MAX_JOBS jobs or on EOF; execd respawns as needed.
+"""
+import os
+import shutil
+import socket
+import struct
+import sys
+import tempfile
+import time
+import traceback
+
+# execd retires pooled containers after SANDBOX_MAX_USES (default 100) runs,
+# so this is a backstop rather than the usual recycle trigger.
+MAX_JOBS = 128
+
+# Keep in sync with execd.OUTPUT_CAP: the host truncates to this anyway, so
+# don't ship more than that per stream in a response frame.
+OUTPUT_CAP = 32_768
+
+
+def _read_exact(stream, n: int):
+    buf = b""
+    while len(buf) < n:
+        chunk = stream.read(n - len(buf))
+        if not chunk:
+            return None
+        buf += chunk
+    return buf
+
+
+def _flush_std_streams():
+    for stream in (sys.stdout, sys.stderr):
+        try:
+            stream.flush()
+        except (ValueError, OSError):
+            pass  # the job may have closed or replaced the stream
+
+
+def _run_job(code: str):
+    exit_code = 0
+    # Fresh scratch cwd per job; removed afterwards so jobs never see each
+    # other's files even though the container is long-lived.
+    job_dir = tempfile.mkdtemp(prefix="run-", dir="/tmp")
+    prev_cwd = os.getcwd()
+    os.chdir(job_dir)
+    # Capture at the fd level (dup2 onto scratch files) so output from
+    # subprocesses, os.write(1, ...) and C extensions is caught like it was
+    # under `python -` — and can't corrupt the frame stream when that runs
+    # over stdout.
+    _flush_std_streams()
+    saved_out, saved_err = os.dup(1), os.dup(2)
+    try:
+        with open(os.path.join(job_dir, ".stdout"), "w+b") as out_f, \
+             open(os.path.join(job_dir, ".stderr"), "w+b") as err_f:
+            os.dup2(out_f.fileno(), 1)
+            os.dup2(err_f.fileno(), 2)
+            try:
+                exec(compile(code, "<run>", "exec"), {"__name__": "__main__"})
+            except SystemExit as e:
+                if isinstance(e.code, int):
+                    exit_code = e.code
+                elif e.code is not None:
+                    print(e.code, file=sys.stderr)
+                    exit_code = 1
+            except BaseException:
+                traceback.print_exc()
+                exit_code = 1
+            finally:
+                _flush_std_streams()
+                os.dup2(saved_out, 1)
+                os.dup2(saved_err, 2)
+            out_f.seek(0)
+            out_b = out_f.read(OUTPUT_CAP)
+            err_f.seek(0)
+            err_b = err_f.read(OUTPUT_CAP)
+    finally:
+        os.close(saved_out)
+        os.close(saved_err)
+        os.chdir(prev_cwd)
+        shutil.rmtree(job_dir, ignore_errors=True)
+    return exit_code, out_b, err_b
+
+
+def _serve(rstream, wstream):
+    for _ in range(MAX_JOBS):
+        header = _read_exact(rstream, 4)
+        if header is None:
+            return
+        (code_len,) = struct.unpack(">I", header)
+        code_b = _read_exact(rstream, code_len)
+        if code_b is None:
+            return
+        exit_code, out_b, err_b = _run_job(code_b.decode("utf-8", errors="replace"))
+        wstream.write(struct.pack(">iII", exit_code, len(out_b), len(err_b)))
+        wstream.write(out_b)
+        wstream.write(err_b)
+        wstream.flush()
+
+
+def _connect(path: str) -> socket.socket:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # The host creates the listening socket around the same time we start;
+    # retry briefly instead of racing it.
+    for _ in range(50):
+        try:
+            sock.connect(path)
+            return sock
+        except OSError:
+            time.sleep(0.1)
+    sys.exit(1)
+
+
+def main():
+    if len(sys.argv) >= 3 and sys.argv[1] == "--socket":
+        sock = _connect(sys.argv[2])
+        with sock, sock.makefile("rb") as rstream, sock.makefile("wb") as wstream:
+            _serve(rstream, wstream)
+    else:
+        _serve(sys.stdin.buffer, sys.stdout.buffer)
+
+
+if __name__ == "__main__":
+    main()
@@ -12,86 +12,144 @@ import os, re, time, argparse, sys, asyncio
 from typing import List, Tuple, Optional
 import aiohttp
 
-HAPI_MATCH_ERR = "Invalid match URL"
+# HAPI rejects bundles whose inline match URLs don't resolve yet with an
+# OperationOutcome mentioning one of these; a single compiled alternation
+# beats two substring scans over the (often large) error body.
+_HAPI_1091_RE = re.compile(r"Invalid match URL|HAPI-1091")
 
-def read_bytes(path: str) -> bytes:
-    with open(path, "rb") as fh:
-        return fh.read()
+# Built once and installed as session defaults in main() — constructing a
+# fresh dict + ClientTimeout per call is needless churn across thousands of bundles.
+FHIR_HEADERS = {"Content-Type": "application/fhir+json", "Accept": "application/fhir+json"}
+UPLOAD_TIMEOUT = aiohttp.ClientTimeout(total=120)
+
+_CHUNK_SIZE = 64 * 1024
 
-async def post_bundle(session: aiohttp.ClientSession, base_url: str, body: bytes, token: Optional[str] = None, timeout: int = 120) -> aiohttp.ClientResponse:
-    headers = {"Content-Type": "application/fhir+json", "Accept": "application/fhir+json"}
-    if token: headers["Authorization"] = f"Bearer {token}"
-    return await session.post(base_url, data=body, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout))
+async def _file_chunks(path: str):
+    # Reads run in worker threads so a slow disk never stalls the event loop.
+    with open(path, "rb") as fh:
+        while True:
+            chunk = await asyncio.to_thread(fh.read, _CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+async def post_bundle(session: aiohttp.ClientSession, base_url: str, path: str) -> aiohttp.ClientResponse:
+    # Stream the bundle from disk instead of slurping it into memory —
+    # peak RSS no longer scales with max_workers x bundle size. An explicit
+    # Content-Length keeps the upload non-chunked for the server; other
+    # headers (incl. Authorization) and timeout come from the session defaults.
+    headers = {"Content-Length": str(os.path.getsize(path))}
+    return await session.post(base_url, data=_file_chunks(path), headers=headers)
+
+# Compiled once; is_seed_file runs once per file in the dump directory.
+_SEED_RE = re.compile(r"^(practitionerInformation|hospitalInformation).+\.json$", re.IGNORECASE)
 
 def is_seed_file(name: str) -> bool:
-    return bool(re.search(r"^(practitionerInformation|hospitalInformation).+\.json$", name, re.IGNORECASE))
+    return _SEED_RE.match(name) is not None
 
 def plan_files(root: str):
-    all_json = [f for f in os.listdir(root) if f.lower().endswith(".json")]
-    seeds = sorted([f for f in all_json if is_seed_file(f)])
-    rest = sorted([f for f in all_json if f not in seeds])
+    # Single scandir pass: classify each entry as we list it instead of
+    # building an intermediate list and filtering it twice.
+    seeds: List[str] = []
+    rest: List[str] = []
+    with os.scandir(root) as entries:
+        for entry in entries:
+            name = entry.name
+            if not name.lower().endswith(".json") or not entry.is_file():
+                continue
+            (seeds if is_seed_file(name) else rest).append(name)
+    seeds.sort()
+    rest.sort()
     return seeds, rest
 
 def looks_like_hapi_1091(text: str) -> bool:
-    return HAPI_MATCH_ERR in text or "HAPI-1091" in text
+    return _HAPI_1091_RE.search(text) is not None
+
+async def upload_file_worker(session: aiohttp.ClientSession, sem: asyncio.Semaphore, base_url: str, root_dir: str, filename: str) -> Tuple[str, Optional[str], bool]:
+    """Returns (filename, error_text, is_hapi_1091); error_text is None on success.
 
-async def upload_file_worker(session: aiohttp.ClientSession, sem: asyncio.Semaphore, base_url: str, root_dir: str, filename: str, token: Optional[str]) -> Tuple[str, Optional[str]]:
+    The HAPI-1091 classification happens here, once per failure, so the retry
+    loop never has to re-scan large OperationOutcome bodies.
+    """
     path = os.path.join(root_dir, filename)
-    async with sem: # Acquire semaphore to limit concurrency
-        try:
-            body = read_bytes(path) # File I/O is still synchronous, but generally fast enough
-            resp = await post_bundle(session, base_url, body, token=token)
-            if 200 <= resp.status < 300:
-                return filename, None
-            return filename, await resp.text()
-        except aiohttp.ClientError as e:
-            return filename, str(e)
-        except Exception as e:
-            return filename, f"An unexpected error occurred: {e}"
+    try:
+        async with sem: # Acquire semaphore to limit concurrent uploads
+            # async with releases the response even when the body is never
+            # read (the 2xx path), so the connection goes back to the
+            # keep-alive pool instead of being closed at GC time.
+            async with await post_bundle(session, base_url, path) as resp:
+                if 200 <= resp.status < 300:
+                    return filename, None, False
+                text = await resp.text()
+                return filename, text, looks_like_hapi_1091(text)
+    except aiohttp.ClientError as e:
+        return filename, str(e), False
+    except Exception as e:
+        return filename, f"An unexpected error occurred: {e}", False
+
+async def phase_upload_seeds(session: aiohttp.ClientSession, base_url: str, root: str, files: List[str], max_workers: int = 4) -> List[str]:
+    # Practitioner and hospital seeds are independent resource types, so they
+    # can upload concurrently; only the patient bundles depend on them.
+    if not files: return []
+    print("─"*20); print(f"Uploading {len(files)} seed files...")
 
-async def phase_upload_seeds(session: aiohttp.ClientSession, base_url: str, root: str, files: List[str], token: Optional[str] = None) -> List[str]:
-    failures = []
-    if not files: return failures
-    print("─"*20); print("Uploading seed files...")
-    for name in files:
+    sem = asyncio.Semaphore(max_workers)
+
+    async def _upload_one(name: str) -> Tuple[str, bool]:
         path = os.path.join(root, name)
-        print(f"[seed] Uploading {name} ...")
-        try:
-            body = read_bytes(path)
-            resp = await post_bundle(session, base_url, body, token=token)
-            if 200 <= resp.status < 300:
-                print(f"  ✓ Success ({resp.status})")
-            else:
-                text = await resp.text()
+        async with sem:
+            try:
+                async with await post_bundle(session, base_url, path) as resp:
+                    if 200 <= resp.status < 300:
+                        print(f"  ✓ [seed] {name} ({resp.status})")
+                        return name, True
+                    text = await resp.text()
                 preview = text[:300].replace("\n", " ")
-                print(f"  ✗ Failed ({resp.status}): {preview}")
-                failures.append(name)
-        except aiohttp.ClientError as e:
-            print(f"  ✗ Request failed: {e}"); failures.append(name)
-        except Exception as e:
-            print(f"  ✗ Read error: {e}"); failures.append(name)
+                print(f"  ✗ [seed] {name} failed ({resp.status}): {preview}")
+            except aiohttp.ClientError as e:
+                print(f"  ✗ [seed] {name} request failed: {e}")
+            except Exception as e:
+                print(f"  ✗ [seed] {name} error: {e}")
+            return name, False
+
+    results = await asyncio.gather(*(_upload_one(n) for n in files))
     print("─"*20)
-    return failures
+    return sorted(name for name, ok in results if not ok)
 
-async def phase_upload_parallel(session: aiohttp.ClientSession, base_url: str, root: str, files: List[str], token: Optional[str] = None,
+async def phase_upload_parallel(session: aiohttp.ClientSession, base_url: str, root: str, files: List[str],
                                 label: str = "main", max_workers: int = 4):
     failures = []
     success_count = 0
     total_files = len(files)
     print(f"[{label}] Starting async upload of {total_files} patient bundle files...")
-    
+
     sem = asyncio.Semaphore(max_workers)
-    tasks = [upload_file_worker(session, sem, base_url, root, f, token) for f in files]
-    
-    for i, future in enumerate(asyncio.as_completed(tasks)):
-        filename, error_text = await future
-        
-        if error_text:
-            failures.append((filename, error_text))
-            print(f"  ✗ [{i+1}/{total_files}] Failed to upload {filename}.")
+
+    # Per-file prints serialize completions on stdout flushes; emit progress
+    # at most every 32 completions or once a second instead.
+    done = 0
+    last_report = time.monotonic()
+
+    async def tracked(name: str) -> Tuple[str, Optional[str], bool]:
+        nonlocal done, last_report
+        result = await upload_file_worker(session, sem, base_url, root, name)
+        done += 1
+        now = time.monotonic()
+        if done == total_files or done % 32 == 0 or now - last_report >= 1.0:
+            last_report = now
+            sys.stdout.write(f"  [{label}] {done}/{total_files} bundles processed\n")
+            sys.stdout.flush()
+        return result
+
+    results = await asyncio.gather(*(tracked(f) for f in files), return_exceptions=True)
+
+    for name, result in zip(files, results):
+        if isinstance(result, BaseException):
+            failures.append((name, f"An unexpected error occurred: {result}", False))
+        elif result[1]:
+            failures.append(result)
         else:
             success_count += 1
-            print(f"  ✓ [{i+1}/{total_files}] Successfully uploaded {filename}.")
 
     print(f"[{label}] Async upload phase complete. Success: {success_count}, Failures: {len(failures)}")
     return failures
@@ -109,7 +167,22 @@ async def main():
 
     if not os.path.isdir(args.dir): raise SystemExit(f"Directory not found: {args.dir}")
 
-    async with aiohttp.ClientSession() as session:
+    headers = dict(FHIR_HEADERS)
+    if args.token:
+        headers["Authorization"] = f"Bearer {args.token}"
+
+    # The default TCPConnector caps at 100 connections and can drop idle
+    # keepalive sockets; size the pool past the worker count so the semaphore
+    # is the real throttle, and keep connections warm between bundles.
+    connector = aiohttp.TCPConnector(
+        limit=args.workers * 2,
+        limit_per_host=args.workers * 2,
+        keepalive_timeout=75,
+        enable_cleanup_closed=True,
+        force_close=False,
+    )
+
+    async with aiohttp.ClientSession(connector=connector, headers=headers, timeout=UPLOAD_TIMEOUT) as session:
         try:
             async with session.get(f"{args.base_url}/metadata", timeout=aiohttp.ClientTimeout(total=30)) as meta:
                 if meta.status // 100 != 2:
@@ -118,21 +191,21 @@ async def main():
             print(f"Warning: Could not GET /metadata: {e}")
 
         seeds, rest = plan_files(args.dir)
-        seed_failures = await phase_upload_seeds(session, args.base_url, args.dir, seeds, token=args.token)
+        seed_failures = await phase_upload_seeds(session, args.base_url, args.dir, seeds, max_workers=args.workers)
         if seed_failures:
             print("\nSome seed files failed; address those for references to resolve.")
 
-        all_failures = await phase_upload_parallel(session, args.base_url, args.dir, rest, token=args.token,
+        all_failures = await phase_upload_parallel(session, args.base_url, args.dir, rest,
                                                    label="main", max_workers=args.workers)
 
         for attempt in range(1, args.retry + 1):
             if not all_failures: break
-            to_retry = [t for t in all_failures if looks_like_hapi_1091(t[1])]
-            other = [t for t in all_failures if not looks_like_hapi_1091(t[1])]
+            to_retry = [t for t in all_failures if t[2]]
+            other = [t for t in all_failures if not t[2]]
             if not to_retry: all_failures = other; break
             files = [t[0] for t in to_retry]
             print(f"\nRetry pass {attempt}/{args.retry} for {len(files)} HAPI-1091 errors...")
-            retry = await phase_upload_parallel(session, args.base_url, args.dir, files, token=args.token,
+            retry = await phase_upload_parallel(session, args.base_url, args.dir, files,
                                                 label=f"retry {attempt}", max_workers=args.workers)
             all_failures = other + retry
             await asyncio.sleep(2)
@@ -152,4 +225,9 @@ async def main():
     print("="*49)
 
 if __name__ == "__main__":
+    try:
+        import uvloop  # libuv-backed event loop; a solid win for bulk HTTP
+        uvloop.install()
+    except ImportError:
+        pass  # stdlib selector loop works fine, just slower
     asyncio.run(main())
\ No newline at end of file